@@ -1,28 +1,37 @@
 import streamlit as st
+import io
 import os
-import json
-import re
-import requests
+import shutil
 import pandas as pd
+import matplotlib
+matplotlib.use("Agg")  # Render off-screen; no GUI backend detection
 import matplotlib.pyplot as plt
 import numpy as np
+import orjson
+import plotly.graph_objects as go
 from evaluator import (
     load_weights,
-    extract_text_from_pdf,
-    extract_sections,
-    score_sections_with_optional_gemini,
+    parse_proposal,
+    score_proposals,
 )
 from db import save_api_key, get_api_key
 
 OUTPUTS_DIR = "outputs"
 PROPOSALS_DIR = "proposals"
+CACHE_DIR = os.path.join(OUTPUTS_DIR, ".cache")
 API_SERVICE_NAME = "google_gemini"
 
+@st.cache_resource
+def get_weights():
+    return load_weights()
+
 def save_uploaded_file(uploaded_file, save_dir):
     os.makedirs(save_dir, exist_ok=True)
     file_path = os.path.join(save_dir, uploaded_file.name)
+    # Stream in 1 MB chunks; rewind first since reruns may leave the position at the end
+    uploaded_file.seek(0)
     with open(file_path, "wb") as f:
-        f.write(uploaded_file.getbuffer())
+        shutil.copyfileobj(uploaded_file, f, length=2**20)
     return file_path
 
 def plot_bar_chart(df):
@@ -43,25 +52,30 @@ def plot_bar_chart(df):
 
 def plot_radar_chart(df):
     categories = ['cost_score', 'technical_merit_score', 'past_performance_score']
-    labels = np.array(categories)
-    num_vars = len(categories)
-    angles = np.linspace(0, 2 * np.pi, num_vars, endpoint=False).tolist()
-    angles += angles[:1]
-
-    fig, ax = plt.subplots(figsize=(6, 6), subplot_kw=dict(polar=True))
-    for idx, row in df.iterrows():
-        values = row[categories].tolist()
-        values += values[:1]
-        ax.plot(angles, values, label=row['vendor'])
-        ax.fill(angles, values, alpha=0.25)
-    ax.set_xticks(angles[:-1])
-    ax.set_xticklabels(labels)
-    ax.set_yticklabels([])
-    ax.set_title('Proposal Scores Radar Chart')
-    ax.legend(loc='upper right', bbox_to_anchor=(1.3, 1.1))
-    plt.tight_layout()
+    # Repeat the first category to close each polygon
+    theta = categories + categories[:1]
+    fig = go.Figure()
+    for vendor, values in zip(df['vendor'], df[categories].to_numpy()):
+        fig.add_trace(go.Scatterpolar(
+            r=np.append(values, values[0]), theta=theta, name=vendor, fill='toself', opacity=0.75
+        ))
+    fig.update_layout(
+        title='Proposal Scores Radar Chart',
+        polar=dict(radialaxis=dict(showticklabels=False)),
+    )
     return fig
 
+def figure_to_png(fig):
+    buf = io.BytesIO()
+    # Same defaults st.pyplot uses, so charts look unchanged
+    fig.savefig(buf, format="png", bbox_inches="tight", dpi=200)
+    plt.close(fig)
+    return buf.getvalue()
+
+@st.cache_data(show_spinner=False)
+def render_bar_chart(df):
+    return figure_to_png(plot_bar_chart(df))
+
 def main():
     st.title("AI-Based Proposal Evaluation Assistant")
 
@@ -106,70 +120,41 @@ def main():
     )
 
     if uploaded_files and 2 <= len(uploaded_files) <= 3:
-        weights = load_weights()
-        results = []
+        weights = get_weights()
         gemini_explanations = []
         st.info("Processing proposals...")
 
-        all_costs = []
-        for uploaded_file in uploaded_files:
-            file_path = save_uploaded_file(uploaded_file, PROPOSALS_DIR)
-            text = extract_text_from_pdf(file_path)
-            sections = extract_sections(text)
-            numbers = re.findall(r"\$?([\d,]+(?:\.\d+)?)", sections.get("cost", "").replace(",", ""))
-            costs = [float(num) for num in numbers if num.replace('.', '', 1).isdigit()]
-            all_costs.append(min(costs) if costs else None)
-
-        for idx, uploaded_file in enumerate(uploaded_files):
-            file_path = os.path.join(PROPOSALS_DIR, uploaded_file.name)
-            text = extract_text_from_pdf(file_path)
-            sections = extract_sections(text)
-            # Remove all_costs argument as it is not accepted by score_sections_with_optional_gemini
-            scores = score_sections_with_optional_gemini(
-                sections, weights, api_key=stored_key if use_gemini else None
-            )
-            results.append({
-                "vendor": uploaded_file.name,
-                "cost_score": scores["cost_score"],
-                "technical_merit_score": scores["technical_merit_score"],
-                "past_performance_score": scores["past_performance_score"],
-                "final_score": scores["final_score"],
-                "summary": "\n\n".join([sections.get("cost", ""), sections.get("technical_merit", ""), sections.get("past_performance", "")])
-            })
-
-            if use_gemini and use_gemini_explain:
-                try:
-                    url = "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent"
-                    headers = {
-                        "Content-Type": "application/json",
-                        "X-goog-api-key": stored_key
-                    }
-                    prompt_text = f"""Provide a concise, bullet-point summary of key insights about the following proposal sections. Keep it short and to the point.\n\nCost:\n{sections.get('cost', '')}\n\nTechnical Approach:\n{sections.get('technical_merit', '')}\n\nPast Performance:\n{sections.get('past_performance', '')}"""
-                    data = {
-                        "contents": [
-                            {
-                                "parts": [
-                                    {"text": prompt_text}
-                                ]
-                            }
-                        ]
-                    }
-                    response = requests.post(url, headers=headers, json=data)
-                    response.raise_for_status()
-                    explanation_raw = response.json().get("candidates", [{}])[0].get("content", "No explanation available.")
-                    if isinstance(explanation_raw, str):
-                        explanation = explanation_raw.strip()
-                    elif isinstance(explanation_raw, dict) and "parts" in explanation_raw:
-                        # Join parts text if content is structured
-                        explanation = "\n".join(part.get("text", "") for part in explanation_raw["parts"])
-                    else:
-                        explanation = str(explanation_raw)
-                    gemini_explanations.append({"vendor": uploaded_file.name, "explanation": explanation})
-                except Exception as e:
-                    gemini_explanations.append({"vendor": uploaded_file.name, "explanation": f"Error fetching explanation: {e}"})
-
-        if results:
-            df = pd.DataFrame(results)
+        file_paths = [save_uploaded_file(uploaded_file, PROPOSALS_DIR) for uploaded_file in uploaded_files]
+        # Parsed serially: for 2-3 proposals a worker pool costs more to start than it saves,
+        # and repeat runs are served from the content-hash cache without touching PyMuPDF.
+        parsed = [
+            (uploaded_file.name, parse_proposal(file_path, cache_dir=CACHE_DIR))
+            for uploaded_file, file_path in zip(uploaded_files, file_paths)
+        ]
+
+        # Cost scores are normalized across all proposals inside score_proposals
+        all_scores = score_proposals(
+            [sections for _, sections in parsed],
+            weights,
+            api_key=stored_key if use_gemini else None,
+            explain=use_gemini_explain,
+        )
+
+        if use_gemini and use_gemini_explain:
+            for (name, _), scores in zip(parsed, all_scores):
+                explanation = scores["explanation"] or "Error fetching explanation: Gemini request failed."
+                gemini_explanations.append({"vendor": name, "explanation": explanation})
+
+        if parsed:
+            # Build the frame column-wise with explicit dtypes rather than from per-row dicts
+            columns = {"vendor": pd.Categorical([name for name, _ in parsed])}
+            for column in ["cost_score", "technical_merit_score", "past_performance_score", "final_score"]:
+                columns[column] = np.fromiter((scores[column] for scores in all_scores), dtype=np.float64, count=len(all_scores))
+            columns["summary"] = [
+                "\n\n".join([sections.get("cost", ""), sections.get("technical_merit", ""), sections.get("past_performance", "")])
+                for _, sections in parsed
+            ]
+            df = pd.DataFrame(columns)
             df["rank"] = df["final_score"].rank(ascending=False, method="min").astype(int)
             df = df.sort_values("rank")
 
@@ -177,8 +162,8 @@ def main():
             st.dataframe(df[["vendor", "cost_score", "technical_merit_score", "past_performance_score", "final_score", "rank"]])
 
             st.subheader("Score Visualizations")
-            st.pyplot(plot_bar_chart(df))
-            st.pyplot(plot_radar_chart(df))
+            st.image(render_bar_chart(df))
+            st.plotly_chart(plot_radar_chart(df))
 
             if use_gemini and use_gemini_explain:
                 st.subheader("Gemini Explanations and Insights")
@@ -186,16 +171,15 @@ def main():
                     st.markdown(f"### {item['vendor']}")
                     st.write(item["explanation"])
 
-            os.makedirs(OUTPUTS_DIR, exist_ok=True)
-            excel_path = os.path.join(OUTPUTS_DIR, "ranked_output.xlsx")
-            json_path = os.path.join(OUTPUTS_DIR, "ranked_output.json")
-            df.to_excel(excel_path, index=False)
-            df.to_json(json_path, orient="records", indent=2)
-
-            with open(excel_path, "rb") as f:
-                st.download_button("Download Excel", data=f, file_name="ranked_output.xlsx")
-            with open(json_path, "rb") as f:
-                st.download_button("Download JSON", data=f, file_name="ranked_output.json")
+            # Reports are built in memory for the download buttons instead of written to disk
+            excel_buffer = io.BytesIO()
+            df.to_excel(excel_buffer, index=False, engine="xlsxwriter")
+            st.download_button("Download Excel", data=excel_buffer.getvalue(), file_name="ranked_output.xlsx")
+            st.download_button(
+                "Download JSON",
+                data=orjson.dumps(df.to_dict(orient="records"), option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY),
+                file_name="ranked_output.json",
+            )
         else:
             st.warning("No results to display.")
     elif uploaded_files:
@@ -2,48 +2,57 @@ import sqlite3
 import threading
 
 DB_PATH = "api_key_store.db"
+# Serializes writes and connection setup; reads run without it
 _LOCK = threading.Lock()
+_CONN = None
 
 def _get_connection():
-    conn = sqlite3.connect(DB_PATH, check_same_thread=False)
-    return conn
+    global _CONN
+    if _CONN is None:
+        conn = sqlite3.connect(DB_PATH, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        _CONN = conn
+    return _CONN
+
+def close_db():
+    global _CONN
+    with _LOCK:
+        if _CONN is not None:
+            _CONN.close()
+            _CONN = None
 
 def initialize_db():
+    # (Re)open the cached connection so a changed DB_PATH takes effect
+    close_db()
     with _LOCK:
         conn = _get_connection()
-        cursor = conn.cursor()
-        cursor.execute("""
+        conn.execute("""
             CREATE TABLE IF NOT EXISTS api_keys (
                 id INTEGER PRIMARY KEY,
                 service TEXT UNIQUE,
                 api_key TEXT
             )
         """)
-        conn.commit()
-        conn.close()
 
 def save_api_key(service: str, api_key: str):
     with _LOCK:
         conn = _get_connection()
-        cursor = conn.cursor()
-        cursor.execute("""
+        conn.execute("""
             INSERT INTO api_keys (service, api_key)
             VALUES (?, ?)
             ON CONFLICT(service) DO UPDATE SET api_key=excluded.api_key
         """, (service, api_key))
-        conn.commit()
-        conn.close()
 
 def get_api_key(service: str):
-    with _LOCK:
-        conn = _get_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT api_key FROM api_keys WHERE service = ?", (service,))
-        row = cursor.fetchone()
-        conn.close()
-        if row:
-            return row[0]
-        return None
+    conn = _CONN
+    if conn is None:
+        with _LOCK:
+            conn = _get_connection()
+    row = conn.execute("SELECT api_key FROM api_keys WHERE service = ?", (service,)).fetchone()
+    if row:
+        return row[0]
+    return None
 
 # Initialize DB on import
 initialize_db()
@@ -1,19 +1,103 @@
-import json
+import hashlib
+import os
 import re
 import fitz  # PyMuPDF
 import logging
-from typing import Dict, Optional
+import numpy as np
+import orjson
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
 
 import requests
+from requests.adapters import HTTPAdapter
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Shared HTTP session so Gemini calls reuse pooled TCP+TLS connections
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+# Request bodies are serialized with orjson and sent as raw bytes
+_SESSION.headers["Content-Type"] = "application/json"
+
+GEMINI_URL = "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent"
+
+# Structured output schemas for the combined scoring request, with and without an explanation
+_SCORE_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "tech": {"type": "NUMBER"},
+        "past": {"type": "NUMBER"},
+    },
+    "required": ["tech", "past"],
+}
+_SCORE_AND_EXPLAIN_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        **_SCORE_SCHEMA["properties"],
+        "explanation": {"type": "STRING"},
+    },
+    "required": _SCORE_SCHEMA["required"] + ["explanation"],
+}
+
+# Section heading phrases, tried in this order at each position
+_HEADINGS = {
+    "technical_approach": "Technical Approach",
+    "technical_proposal": "Technical Proposal",
+    "past_performance": "Past Performance",
+    "cost": "Cost",
+    "pricing": "Pricing",
+    "budget": "Budget",
+    "approach": "Approach",
+    "experience": "Experience",
+    "references": "References",
+}
+
+def _initials_class(phrases) -> str:
+    """Case-sensitive character class of the first letters of phrases, e.g. "[cCtT]"."""
+    return "[" + "".join(sorted({c for phrase in phrases for c in phrase[0].lower() + phrase[0].upper()})) + "]"
+
+# Zero-width lookahead so overlapping headings are all found in one pass over the text;
+# the leading character class cheaply skips positions that cannot start a heading
+_HEADINGS_RE = re.compile(
+    f"(?={_initials_class(_HEADINGS.values())})"
+    "(?i:(?=" + "|".join(f"(?P<{name}>{phrase})" for name, phrase in _HEADINGS.items()) + "))"
+)
+# Headings that start each section, and headings that end it
+_SECTION_BOUNDARIES = {
+    "cost": ({"cost", "pricing", "budget"}, {"technical_approach", "past_performance"}),
+    "technical_merit": ({"technical_approach", "technical_proposal", "approach"}, {"cost", "past_performance"}),
+    "past_performance": ({"past_performance", "experience", "references"}, {"cost", "technical_approach"}),
+}
+# Keywords counted by the heuristic scorer, matched case-insensitively as substrings
+_KEYWORDS = ["experience", "quality", "performance", "reliable", "efficient"]
+_KW_RE = re.compile(f"(?={_initials_class(_KEYWORDS)})(?i:" + "|".join(_KEYWORDS) + ")")
+# Same keywords as one byte buffer plus offsets, for the compiled scanner
+_KW_BYTES = np.frombuffer("".join(_KEYWORDS).encode("ascii"), dtype=np.uint8)
+_KW_LENGTHS = np.array([len(k) for k in _KEYWORDS], dtype=np.int64)
+_KW_STARTS = np.concatenate(([0], np.cumsum(_KW_LENGTHS)[:-1])).astype(np.int64)
+# Sections at least this long are scored with the compiled scanner when numba is installed
+_NUMBA_MIN_CHARS = 50_000
+# Non-ASCII characters a byte scanner would treat differently: Unicode whitespace that
+# str.split() splits on, and the dotted/dotless i that IGNORECASE matches against "i"
+_NON_ASCII_SPECIAL_RE = re.compile("[\x85\xa0\u1680\u2000-\u200a\u2028\u2029\u202f\u205f\u3000\u0130\u0131]")
+# Numbers that look like costs (e.g., $12345, 12345)
+_COST_NUM_RE = re.compile(r"\$?([\d,]+(?:\.\d+)?)")
+_DIGIT_RE = re.compile(r"\d")
+
+# Plain text extraction flags: keep clipping to the page and the unknown-glyph fallback,
+# but let ligatures expand ("ﬁ" -> "fi") and whitespace normalize, which both suit
+# the regex-based section and keyword matching better than the defaults
+_TEXT_FLAGS = fitz.TEXT_MEDIABOX_CLIP | fitz.TEXT_CID_FOR_UNKNOWN_UNICODE
+
+# Bump when extraction or section splitting changes so stale cache entries are ignored
+SECTIONS_CACHE_VERSION = 2
+
 def load_weights(path: str = "weights_config.json") -> Dict[str, float]:
     """Load scoring weights from JSON file."""
     try:
-        with open(path, "r") as f:
-            weights = json.load(f)
+        with open(path, "rb") as f:
+            weights = orjson.loads(f.read())
         return weights
     except Exception as e:
         logger.error(f"Failed to load weights config: {e}")
@@ -23,11 +107,9 @@ def load_weights(path: str = "weights_config.json") -> Dict[str, float]:
 def extract_text_from_pdf(pdf_path: str) -> str:
     """Extract all text from a PDF file."""
     try:
-        doc = fitz.open(pdf_path)
-        text = ""
-        for page in doc:
-            text += page.get_text()
-        return text
+        with fitz.open(pdf_path) as doc:
+            # Unsorted output: section detection doesn't depend on reading order
+            return "".join(page.get_text("text", sort=False, flags=_TEXT_FLAGS) for page in doc)
     except Exception as e:
         logger.error(f"Error reading PDF {pdf_path}: {e}")
         return ""
@@ -35,38 +117,58 @@ def extract_text_from_pdf(pdf_path: str) -> str:
 def extract_sections(text: str) -> Dict[str, str]:
     """
     Extract Cost, Technical Approach, and Past Performance sections from text.
-    Uses regex to find sections by headings.
+    Finds all headings in a single scan, then slices each section from its first
+    heading up to the next heading that ends it.
     """
     sections = {"cost": "", "technical_merit": "", "past_performance": ""}
-    # Regex patterns for sections - case insensitive, allow some flexibility
-    patterns = {
-        "cost": r"(?:Cost|Pricing|Budget)[\s\S]*?(?=(?:Technical Approach|Past Performance|$))",
-        "technical_merit": r"(?:Technical Approach|Technical Proposal|Approach)[\s\S]*?(?=(?:Cost|Past Performance|$))",
-        "past_performance": r"(?:Past Performance|Experience|References)[\s\S]*?(?=(?:Cost|Technical Approach|$))",
-    }
-    for key, pattern in patterns.items():
-        match = re.search(pattern, text, re.IGNORECASE)
-        if match:
-            sections[key] = match.group(0).strip()
+    # Sections whose start heading has been seen: key -> (start, end of heading)
+    open_sections = {}
+    pending = set(_SECTION_BOUNDARIES)
+    for match in _HEADINGS_RE.finditer(text):
+        name, pos = match.lastgroup, match.start()
+        for key in list(pending):
+            starts, ends = _SECTION_BOUNDARIES[key]
+            if key in open_sections:
+                start, heading_end = open_sections[key]
+                if name in ends and pos >= heading_end:
+                    sections[key] = text[start:pos].strip()
+                    pending.discard(key)
+            elif name in starts:
+                open_sections[key] = (pos, match.end(name))
+        if not pending:
+            break
+    # Sections still open run to the end of the text
+    for key in pending:
+        if key in open_sections:
+            sections[key] = text[open_sections[key][0]:].strip()
     return sections
 
-def score_cost_section(cost_text: str, all_costs: list = None) -> float:
+def extract_min_cost(cost_text: str) -> Optional[float]:
     """
-    Extract numeric cost from cost_text and return a normalized score (lower cost = higher score).
-    If no cost found, return 0.
-    If all_costs provided, normalize cost relative to all costs.
+    Extract all numbers that look like costs (e.g., $12345, 12345) from cost_text
+    and return the smallest one, or None if no cost is found.
     """
-    # Extract all numbers that look like costs (e.g., $12345, 12345)
-    numbers = re.findall(r"\$?([\d,]+(?:\.\d+)?)", cost_text.replace(",", ""))
+    # Skip the copy and the full regex pass when there can be no number at all
+    if not cost_text or not _DIGIT_RE.search(cost_text):
+        return None
+    numbers = _COST_NUM_RE.findall(cost_text.replace(",", ""))
     costs = []
     for num in numbers:
         try:
             costs.append(float(num))
         except ValueError:
             continue
-    if not costs:
+    return min(costs) if costs else None
+
+def score_cost_section(cost_text: str, all_costs: list = None) -> float:
+    """
+    Extract numeric cost from cost_text and return a normalized score (lower cost = higher score).
+    If no cost found, return 0.
+    If all_costs provided, normalize cost relative to all costs.
+    """
+    cost_value = extract_min_cost(cost_text)  # Use minimum cost found in text
+    if cost_value is None:
         return 0.0
-    cost_value = min(costs)  # Use minimum cost found in text
     if all_costs and len(all_costs) > 1:
         min_cost = min(all_costs)
         max_cost = max(all_costs)
@@ -79,6 +181,62 @@ def score_cost_section(cost_text: str, all_costs: list = None) -> float:
         # Without normalization, return 100 for lowest cost found
         return 100.0
 
+def _scan_words_and_keywords(buf, kw_bytes, kw_starts, kw_lengths):
+    """
+    Count words and keyword matches in one pass over UTF-8 bytes, folding ASCII
+    letters to lowercase as it reads them instead of copying the text.
+    Words are split on the same ASCII whitespace as str.split(); keywords are matched
+    like _KW_RE (leftmost, first keyword wins, non-overlapping).
+    Plain Python so it can be compiled with numba when available.
+    """
+    n = buf.shape[0]
+    word_count = 0
+    keyword_count = 0
+    in_word = False
+    next_match_pos = 0
+    for i in range(n):
+        c = buf[i]
+        if c == 32 or 9 <= c <= 13 or 28 <= c <= 31:
+            in_word = False
+        elif not in_word:
+            in_word = True
+            word_count += 1
+        if i < next_match_pos:
+            continue
+        for k in range(kw_starts.shape[0]):
+            length = kw_lengths[k]
+            if i + length > n:
+                continue
+            start = kw_starts[k]
+            j = 0
+            while j < length:
+                b = buf[i + j]
+                if 65 <= b <= 90:  # ASCII 'A'-'Z'
+                    b |= 0x20
+                if b != kw_bytes[start + j]:
+                    break
+                j += 1
+            if j == length:
+                keyword_count += 1
+                next_match_pos = i + length
+                break
+    return word_count, keyword_count
+
+# Compiled scanner, built on first use so importing this module never pays for numba;
+# False once numba turned out to be missing
+_scan_words_and_keywords_jit = None
+
+def _get_scan_jit():
+    global _scan_words_and_keywords_jit
+    if _scan_words_and_keywords_jit is None:
+        try:
+            from numba import njit
+        except ImportError:  # numba is optional; long sections then use the regex path
+            _scan_words_and_keywords_jit = False
+        else:
+            _scan_words_and_keywords_jit = njit(cache=True)(_scan_words_and_keywords)
+    return _scan_words_and_keywords_jit or None
+
 def heuristic_score_section(text: str) -> float:
     """
     Simple heuristic scoring based on word count and keyword density.
@@ -86,10 +244,16 @@ def heuristic_score_section(text: str) -> float:
     """
     if not text:
         return 0.0
-    word_count = len(text.split())
-    # Simple keyword density for demonstration
-    keywords = ["experience", "quality", "performance", "reliable", "efficient"]
-    keyword_count = sum(text.lower().count(k) for k in keywords)
+    scan_jit = None
+    if len(text) >= _NUMBA_MIN_CHARS and not _NON_ASCII_SPECIAL_RE.search(text):
+        scan_jit = _get_scan_jit()
+    if scan_jit is not None:
+        buf = np.frombuffer(text.encode("utf-8"), dtype=np.uint8)
+        word_count, keyword_count = scan_jit(buf, _KW_BYTES, _KW_STARTS, _KW_LENGTHS)
+    else:
+        word_count = len(text.split())
+        # Simple keyword density for demonstration
+        keyword_count = len(_KW_RE.findall(text))
     # Score formula: weighted sum of normalized word count and keyword density
     score = min(100.0, word_count * 0.5 + keyword_count * 10)
     return score
@@ -114,69 +278,80 @@ def score_sections(sections: Dict[str, str], weights: Dict[str, float]) -> Dict[
         "final_score": final_score
     }
 
-def score_with_gemini(text: str, category: str, api_key: str) -> Optional[float]:
+def _gemini_response_text(response) -> str:
+    """
+    Return the text of the first candidate in a Gemini generateContent response,
+    found at candidates[0].content.parts[0].text.
+    """
+    response_json = orjson.loads(response.content)
+    return response_json["candidates"][0]["content"]["parts"][0]["text"]
+
+def score_and_explain_with_gemini(sections: Dict[str, str], api_key: str, explain: bool = True) -> Optional[Dict]:
     """
-    Use Google Gemini API to score a text section.
-    Returns a numeric score (0-100) or None on failure.
+    Use a single Google Gemini API call to score the Technical Approach and
+    Past Performance sections and, if explain is set, summarize the proposal.
+    Returns {"tech": score or None, "past": score or None, "explanation": str or None},
+    or None on failure. Without explain no summary is requested and "explanation" is None.
     """
     try:
-        url = "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent"
-        headers = {
-            "Content-Type": "application/json",
-            "X-goog-api-key": api_key
-        }
-        prompt_text = f"Rate the following {category.upper()} section (0–100). Respond with only a number.\n\n{text}"
+        headers = {"X-goog-api-key": api_key}
+        if explain:
+            instructions = 'In "explanation", provide a concise, bullet-point summary of key insights about the proposal sections. Keep it short and to the point.'
+        else:
+            instructions = "Respond with only the two scores."
+        prompt_text = f"""Rate the TECHNICAL APPROACH and PAST PERFORMANCE sections of the following proposal (0–100 each) as "tech" and "past". {instructions}\n\nCost:\n{sections.get('cost', '')}\n\nTechnical Approach:\n{sections.get('technical_merit', '')}\n\nPast Performance:\n{sections.get('past_performance', '')}"""
         data = {
             "contents": [
                 {
                     "parts": [
-                        {
-                            "text": prompt_text
-                        }
+                        {"text": prompt_text}
                     ]
                 }
-            ]
+            ],
+            "generationConfig": {
+                "responseMimeType": "application/json",
+                "responseSchema": _SCORE_AND_EXPLAIN_SCHEMA if explain else _SCORE_SCHEMA
+            }
         }
-        response = requests.post(url, headers=headers, json=data)
+        response = _SESSION.post(GEMINI_URL, headers=headers, data=orjson.dumps(data))
         response.raise_for_status()
-        response_json = response.json()
-        # Extract the text response
-        content = ""
         try:
-            content = response_json["candidates"][0]["content"].strip()
-        except (KeyError, IndexError):
+            result = orjson.loads(_gemini_response_text(response))
+        except (KeyError, IndexError, TypeError, ValueError):
             logger.error("Unexpected Gemini API response format.")
             return None
-        score_match = re.findall(r"\d+\.?\d*", content)
-        if not score_match:
-            logger.error("No numeric score found in Gemini response.")
-            return None
-        score = float(score_match[0])
-        if 0 <= score <= 100:
-            return score
-        else:
-            logger.warning(f"Gemini returned out-of-range score: {score}")
+        if not isinstance(result, dict):
+            logger.error("Gemini response is not a JSON object.")
             return None
+        scores = {}
+        for key in ("tech", "past"):
+            score = result.get(key)
+            if isinstance(score, (int, float)) and 0 <= score <= 100:
+                scores[key] = float(score)
+            else:
+                logger.warning(f"Gemini returned invalid {key} score: {score}")
+                scores[key] = None
+        scores["explanation"] = None
+        if explain:
+            scores["explanation"] = str(result.get("explanation", "")).strip() or "No explanation available."
+        return scores
     except Exception as e:
         logger.error(f"Gemini scoring error: {e}")
         return None
 
-def score_sections_with_optional_gemini(sections: Dict[str, str], weights: Dict[str, float], api_key: Optional[str] = None) -> Dict[str, float]:
-    """
-    Score sections using Gemini if api_key provided, else heuristics.
-    Cost always scored heuristically.
-    """
-    cost_score = score_cost_section(sections.get("cost", ""))
+def _score_sections_with_cost_score(sections: Dict[str, str], weights: Dict[str, float], api_key: Optional[str], cost_score: float, explain: bool = False) -> Dict[str, float]:
+    """Score the non-cost sections and combine them with an already computed cost_score."""
+    tech_score = past_score = explanation = None
     if api_key:
-        tech_score = score_with_gemini(sections.get("technical_merit", ""), "TECHNICAL APPROACH", api_key)
-        past_score = score_with_gemini(sections.get("past_performance", ""), "PAST PERFORMANCE", api_key)
-        # Fallback to heuristic if Gemini fails
-        if tech_score is None:
-            tech_score = heuristic_score_section(sections.get("technical_merit", ""))
-        if past_score is None:
-            past_score = heuristic_score_section(sections.get("past_performance", ""))
-    else:
+        gemini_result = score_and_explain_with_gemini(sections, api_key, explain=explain)
+        if gemini_result is not None:
+            tech_score = gemini_result["tech"]
+            past_score = gemini_result["past"]
+            explanation = gemini_result["explanation"]
+    # Fallback to heuristic if Gemini is disabled or fails
+    if tech_score is None:
         tech_score = heuristic_score_section(sections.get("technical_merit", ""))
+    if past_score is None:
         past_score = heuristic_score_section(sections.get("past_performance", ""))
     final_score = (
         cost_score * weights.get("cost", 0) +
@@ -187,5 +362,104 @@ def score_sections_with_optional_gemini(sections: Dict[str, str], weights: Dict[
         "cost_score": cost_score,
         "technical_merit_score": tech_score,
         "past_performance_score": past_score,
-        "final_score": final_score
+        "final_score": final_score,
+        "explanation": explanation
     }
+
+def score_sections_with_optional_gemini(sections: Dict[str, str], weights: Dict[str, float], api_key: Optional[str] = None, all_costs: list = None, explain: bool = False) -> Dict[str, float]:
+    """
+    Score sections using Gemini if api_key provided, else heuristics.
+    Cost always scored heuristically, normalized against all_costs if provided.
+    With explain, the Gemini explanation is returned under "explanation"
+    (None otherwise or without Gemini).
+    """
+    cost_score = score_cost_section(sections.get("cost", ""), all_costs)
+    return _score_sections_with_cost_score(sections, weights, api_key, cost_score, explain)
+
+def score_costs_vectorized(cost_texts: List[str]) -> np.ndarray:
+    """
+    Score several cost sections at once, normalized against each other
+    (lower cost = higher score). Same rules as score_cost_section: 0 where no
+    cost is found, 100 if fewer than two costs are found or all are equal.
+    Returns an array aligned with cost_texts.
+    """
+    # None (no cost found) becomes NaN
+    costs = np.array([extract_min_cost(text) for text in cost_texts], dtype=np.float64)
+    found = ~np.isnan(costs)
+    if np.count_nonzero(found) < 2:
+        return np.where(found, 100.0, 0.0)
+    min_cost, max_cost = np.nanmin(costs), np.nanmax(costs)
+    if max_cost == min_cost:
+        return np.where(found, 100.0, 0.0)
+    return np.where(found, 100.0 * (max_cost - costs) / (max_cost - min_cost), 0.0)
+
+def score_proposals(sections_list: List[Dict[str, str]], weights: Dict[str, float], api_key: Optional[str] = None, explain: bool = False) -> List[Dict[str, float]]:
+    """
+    Score several proposals, returning results in the same order as sections_list.
+    Cost scores are normalized across all proposals in one vectorized step.
+    With an api_key the Gemini calls are issued concurrently on the shared session,
+    so total latency is that of the slowest call rather than the sum; explain also
+    requests a Gemini explanation for each proposal.
+    """
+    cost_scores = score_costs_vectorized([sections.get("cost", "") for sections in sections_list]).tolist()
+    if not api_key or len(sections_list) < 2:
+        return [
+            _score_sections_with_cost_score(sections, weights, api_key, cost_score, explain)
+            for sections, cost_score in zip(sections_list, cost_scores)
+        ]
+    with ThreadPoolExecutor(max_workers=len(sections_list)) as executor:
+        futures = [
+            executor.submit(_score_sections_with_cost_score, sections, weights, api_key, cost_score, explain)
+            for sections, cost_score in zip(sections_list, cost_scores)
+        ]
+        return [future.result() for future in futures]
+
+def _load_cached_sections(cache_path: str) -> Optional[Dict[str, str]]:
+    """Load cached sections from cache_path, or None if missing or unreadable."""
+    try:
+        with open(cache_path, "rb") as f:
+            return orjson.loads(f.read())
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable section cache {cache_path}: {e}")
+        return None
+
+def _save_cached_sections(cache_path: str, sections: Dict[str, str]):
+    """Write sections to cache_path atomically so concurrent workers never see partial files."""
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(orjson.dumps(sections))
+        os.replace(tmp_path, cache_path)
+    except Exception as e:
+        logger.warning(f"Failed to write section cache {cache_path}: {e}")
+
+def parse_proposal(pdf_path: str, cache_dir: Optional[str] = None) -> Dict[str, str]:
+    """
+    Extract and split a single proposal PDF.
+    If cache_dir is given, sections are cached there keyed by a hash of the PDF bytes,
+    so re-evaluating the same file skips PDF extraction entirely.
+    """
+    cache_path = None
+    sections = None
+    if cache_dir:
+        try:
+            # Hashed in 1 MiB chunks so large PDFs are never held in memory whole
+            h = hashlib.blake2b(digest_size=16)
+            with open(pdf_path, "rb") as f:
+                for chunk in iter(lambda: f.read(2**20), b""):
+                    h.update(chunk)
+            digest = h.hexdigest()
+            cache_path = os.path.join(cache_dir, f"{digest}-v{SECTIONS_CACHE_VERSION}.json")
+            sections = _load_cached_sections(cache_path)
+        except OSError as e:
+            logger.error(f"Error reading PDF {pdf_path}: {e}")
+    if sections is None:
+        text = extract_text_from_pdf(pdf_path)
+        sections = extract_sections(text)
+        # Don't cache failed or empty extractions
+        if cache_path and text:
+            _save_cached_sections(cache_path, sections)
+    return sections
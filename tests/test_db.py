@@ -11,9 +11,11 @@ class TestDB(unittest.TestCase):
         db.initialize_db()
 
     def tearDown(self):
-        # Remove test database file
-        if os.path.exists(self.test_db_path):
-            os.remove(self.test_db_path)
+        # Close the cached connection, then remove test database files
+        db.close_db()
+        for path in (self.test_db_path, self.test_db_path + "-wal", self.test_db_path + "-shm"):
+            if os.path.exists(path):
+                os.remove(path)
 
     def test_save_and_get_api_key(self):
         service = "test_service"
@@ -22,6 +24,11 @@ class TestDB(unittest.TestCase):
         retrieved_key = db.get_api_key(service)
         self.assertEqual(api_key, retrieved_key)
 
+    def test_save_api_key_overwrites(self):
+        db.save_api_key("test_service", "old_key")
+        db.save_api_key("test_service", "new_key")
+        self.assertEqual(db.get_api_key("test_service"), "new_key")
+
     def test_get_api_key_nonexistent(self):
         self.assertIsNone(db.get_api_key("nonexistent_service"))
 
@@ -1,10 +1,21 @@
+import json
+import os
+import re
+import tempfile
 import unittest
+from unittest import mock
+import numpy as np
+import evaluator
 from evaluator import (
     load_weights,
     extract_sections,
     score_cost_section,
     heuristic_score_section,
     score_sections_with_optional_gemini,
+    parse_proposal,
+    score_and_explain_with_gemini,
+    score_proposals,
+    score_costs_vectorized,
 )
 
 class TestEvaluator(unittest.TestCase):
@@ -29,16 +40,49 @@ class TestEvaluator(unittest.TestCase):
         self.assertTrue("experience" in sections["technical_merit"])
         self.assertTrue("Reliable" in sections["past_performance"])
 
+    def test_extract_sections_boundaries(self):
+        text = "Pricing: $500. Technical Proposal: microservices and our approach. Past Performance: see References."
+        sections = extract_sections(text)
+        # Each section only ends at another section's main heading
+        self.assertEqual(sections["cost"], "Pricing: $500. Technical Proposal: microservices and our approach.")
+        self.assertEqual(sections["technical_merit"], "Technical Proposal: microservices and our approach.")
+        self.assertEqual(sections["past_performance"], "Past Performance: see References.")
+        self.assertEqual(extract_sections("No headings here."), {"cost": "", "technical_merit": "", "past_performance": ""})
+
     def test_score_cost_section(self):
         cost_text = "Cost: $1000"
         score = score_cost_section(cost_text, all_costs=[1000, 2000, 3000])
         self.assertTrue(0 <= score <= 100)
 
+    def test_score_cost_section_without_numbers(self):
+        self.assertEqual(score_cost_section(""), 0.0)
+        self.assertEqual(score_cost_section("Cost: to be negotiated", all_costs=[1000, 2000]), 0.0)
+
+    def test_score_costs_vectorized(self):
+        cost_texts = ["Cost: $1,000", "Cost: $3000", "No figures", "Cost: $2000"]
+        all_costs = [1000.0, 3000.0, 2000.0]
+        expected = [score_cost_section(text, all_costs) for text in cost_texts]
+        self.assertEqual(score_costs_vectorized(cost_texts).tolist(), expected)
+        self.assertEqual(score_costs_vectorized(["Cost: $5", "Cost: $5"]).tolist(), [100.0, 100.0])
+        self.assertEqual(score_costs_vectorized(["Cost: $5", ""]).tolist(), [100.0, 0.0])
+
     def test_heuristic_score_section(self):
         text = "We have experience and quality."
         score = heuristic_score_section(text)
         self.assertTrue(0 <= score <= 100)
 
+    def test_heuristic_score_section_keywords(self):
+        # Keywords are counted case-insensitively, including inside longer words
+        self.assertEqual(heuristic_score_section("EXPERIENCE, experienced staff"), 3 * 0.5 + 2 * 10)
+        self.assertEqual(heuristic_score_section(""), 0.0)
+
+    def test_scan_words_and_keywords_matches_regex_path(self):
+        # The numba scanner runs the same plain Python function, so check it without numba too
+        text = "Our \u201cexperienced\u201d team:\tQUALITY,\nperformance and efficient\x1cdelivery."
+        buf = np.frombuffer(text.encode("utf-8"), dtype=np.uint8)
+        counts = evaluator._scan_words_and_keywords(buf, evaluator._KW_BYTES, evaluator._KW_STARTS, evaluator._KW_LENGTHS)
+        self.assertEqual(counts, (len(text.split()), len(re.findall("experience|quality|performance|reliable|efficient", text, re.I))))
+
     def test_score_sections_with_optional_gemini_heuristic(self):
         sections = {
             "cost": "Cost: $1000",
@@ -51,5 +95,66 @@ class TestEvaluator(unittest.TestCase):
         self.assertIn("final_score", scores)
         self.assertTrue(0 <= scores["final_score"] <= 100)
 
+    def test_parse_proposal(self):
+        sections = parse_proposal("proposals/proposal1.pdf")
+        self.assertIn("Technical Approach", sections["technical_merit"])
+        self.assertTrue(sections["cost"])
+
+    def test_parse_proposal_cache(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            sections = parse_proposal("proposals/proposal1.pdf", cache_dir=cache_dir)
+            self.assertEqual(len(os.listdir(cache_dir)), 1)
+            with mock.patch("evaluator.extract_text_from_pdf") as extract:
+                cached_sections = parse_proposal("proposals/proposal1.pdf", cache_dir=cache_dir)
+            extract.assert_not_called()
+        self.assertEqual(cached_sections, sections)
+
+    def test_score_sections_with_optional_gemini_all_costs(self):
+        weights = {"cost": 1.0, "technical_merit": 0.0, "past_performance": 0.0}
+        cheap = score_sections_with_optional_gemini({"cost": "Cost: $1000"}, weights, all_costs=[1000, 3000])
+        expensive = score_sections_with_optional_gemini({"cost": "Cost: $3000"}, weights, all_costs=[1000, 3000])
+        self.assertEqual(cheap["cost_score"], 100.0)
+        self.assertEqual(expensive["cost_score"], 0.0)
+
+    def _mock_gemini_response(self, text):
+        response = mock.Mock()
+        response.content = json.dumps({"candidates": [{"content": {"parts": [{"text": text}]}}]}).encode()
+        return response
+
+    def test_score_and_explain_with_gemini(self):
+        payload = json.dumps({"tech": 85, "past": 70, "explanation": "- Solid approach"})
+        with mock.patch("evaluator._SESSION.post", return_value=self._mock_gemini_response(payload)) as post:
+            result = score_and_explain_with_gemini({"technical_merit": "Approach"}, api_key="key")
+        post.assert_called_once()
+        body = json.loads(post.call_args.kwargs["data"])
+        self.assertEqual(body["generationConfig"]["responseMimeType"], "application/json")
+        self.assertEqual(result, {"tech": 85.0, "past": 70.0, "explanation": "- Solid approach"})
+
+    def test_score_and_explain_with_gemini_without_explanation(self):
+        payload = json.dumps({"tech": 85, "past": 70})
+        with mock.patch("evaluator._SESSION.post", return_value=self._mock_gemini_response(payload)) as post:
+            result = score_and_explain_with_gemini({"technical_merit": "Approach"}, api_key="key", explain=False)
+        body = json.loads(post.call_args.kwargs["data"])
+        self.assertNotIn("explanation", body["generationConfig"]["responseSchema"]["properties"])
+        self.assertNotIn("explanation", body["contents"][0]["parts"][0]["text"])
+        self.assertEqual(result, {"tech": 85.0, "past": 70.0, "explanation": None})
+
+    def test_score_sections_with_optional_gemini_fallback(self):
+        sections = {"technical_merit": "We have experience and quality."}
+        weights = {"cost": 0.3, "technical_merit": 0.4, "past_performance": 0.3}
+        with mock.patch("evaluator._SESSION.post", return_value=self._mock_gemini_response("not json")):
+            scores = score_sections_with_optional_gemini(sections, weights, api_key="key")
+        self.assertEqual(scores["technical_merit_score"], heuristic_score_section(sections["technical_merit"]))
+        self.assertIsNone(scores["explanation"])
+
+    def test_score_proposals_preserves_order(self):
+        sections_list = [{"cost": "Cost: $3000"}, {"cost": "Cost: $1000"}]
+        weights = {"cost": 1.0, "technical_merit": 0.0, "past_performance": 0.0}
+        payload = json.dumps({"tech": 50, "past": 50, "explanation": "- Fine"})
+        with mock.patch("evaluator._SESSION.post", return_value=self._mock_gemini_response(payload)):
+            scores = score_proposals(sections_list, weights, api_key="key")
+        self.assertEqual([s["cost_score"] for s in scores], [0.0, 100.0])
+        self.assertEqual([s["technical_merit_score"] for s in scores], [50.0, 50.0])
+
 if __name__ == "__main__":
     unittest.main()